@@ -6,11 +6,8 @@ import yaml
 import click
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import WebDriverException
-from lib_resume_builder_AIHawk import Resume, FacadeManager, ResumeGenerator, StyleManager
 from src.utils import chrome_browser_options
-from src.llm.llm_manager import GPTAnswerer
 from src.aihawk_authenticator import AIHawkAuthenticator
 from src.aihawk_bot_facade import AIHawkBotFacade
 from src.aihawk_job_manager import AIHawkJobManager
@@ -20,13 +17,15 @@ from loguru import logger
 # Suppress stderr only during specific operations
 original_stderr = sys.stderr
 
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
 class ConfigError(Exception):
     pass
 
 class ConfigValidator:
     @staticmethod
     def validate_email(email: str) -> bool:
-        return re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email) is not None
+        return EMAIL_RE.match(email) is not None
     
     @staticmethod
     def validate_yaml_file(yaml_path: Path) -> dict:
@@ -150,6 +149,7 @@ class FileManager:
         return result
 
 def init_browser() -> webdriver.Chrome:
+    from webdriver_manager.chrome import ChromeDriverManager
     try:
         options = chrome_browser_options()
         service = ChromeService(ChromeDriverManager().install())
@@ -157,7 +157,30 @@ def init_browser() -> webdriver.Chrome:
     except Exception as e:
         raise RuntimeError(f"Failed to initialize browser: {str(e)}")
 
+def choose_resume_style(resume_generator_manager, style_manager):
+    style = os.getenv('AIHAWK_STYLE')
+    if style:
+        styles = style_manager.get_styles()
+        if style not in styles:
+            raise ConfigError(f"Unknown resume style '{style}' in AIHAWK_STYLE. Available styles: {', '.join(styles)}")
+    elif not sys.stdin.isatty():
+        styles = style_manager.get_styles()
+        if not styles:
+            raise RuntimeError("No resume styles available and no terminal to create one.")
+        style = sorted(styles)[0]
+        logger.warning(f"Non-interactive session and AIHAWK_STYLE is not set, defaulting to style: {style}")
+    if style:
+        logger.info(f"Using resume style: {style}")
+        resume_generator_manager.selected_style = style
+    else:
+        resume_generator_manager.choose_style()
+
 def create_and_run_bot(parameters, llm_api_key):
+    # Heavy LLM and resume-builder stacks are only imported once the configuration is valid
+    from lib_resume_builder_AIHawk import Resume, FacadeManager, ResumeGenerator, StyleManager
+    from src.llm.llm_manager import GPTAnswerer
+    browser = None
+    gpt_answerer_component = None
     try:
         style_manager = StyleManager()
         resume_generator = ResumeGenerator()
@@ -167,7 +190,7 @@ def create_and_run_bot(parameters, llm_api_key):
         resume_generator_manager = FacadeManager(llm_api_key, style_manager, resume_generator, resume_object, Path("data_folder/output"))
         
         # Run the resume generator manager's functions
-        resume_generator_manager.choose_style()
+        choose_resume_style(resume_generator_manager, style_manager)
         
         job_application_profile_object = JobApplicationProfile(plain_text_resume)
         
@@ -188,8 +211,19 @@ def create_and_run_bot(parameters, llm_api_key):
             bot.start_apply()
     except WebDriverException as e:
         logger.error(f"WebDriver error occurred: {e}")
+    except ConfigError:
+        raise
     except Exception as e:
         raise RuntimeError(f"Error running the bot: {str(e)}")
+    finally:
+        # One browser and one answerer serve the whole session, release them once at the end
+        if gpt_answerer_component is not None:
+            gpt_answerer_component.close()
+        if browser is not None:
+            try:
+                browser.quit()
+            except WebDriverException as e:
+                logger.warning(f"Failed to close the browser: {e}")
 
 
 @click.command()
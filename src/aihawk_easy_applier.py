@@ -22,6 +22,10 @@ from selenium.webdriver.support.ui import Select, WebDriverWait
 import src.utils as utils
 from loguru import logger
 
+CONTROL_CHARS_RE = re.compile(r'[\x00-\x1F\x7F]')
+HORIZONTAL_WHITESPACE_RE = re.compile(r'[ \t\xa0]+')
+BLANK_LINES_RE = re.compile(r'\n{3,}')
+
 
 class AIHawkEasyApplier:
     def __init__(self, driver: Any, resume_dir: Optional[str], set_old_answers: List[Tuple[str, str, str]],
@@ -103,7 +107,7 @@ class AIHawkEasyApplier:
             logger.error(f"Failed to navigate to job link: {job.link}, error: {str(e)}")
             raise
 
-        time.sleep(random.uniform(3, 5))
+        self._wait_for_job_details()
         self.check_for_premium_redirect(job)
 
         try:
@@ -151,6 +155,17 @@ class AIHawkEasyApplier:
 
             raise Exception(f"Failed to apply to job! Original exception:\nTraceback:\n{tb_str}")
 
+    def _wait_for_job_details(self, timeout: float = 10) -> None:
+        logger.debug("Waiting for the job details to render")
+        try:
+            WebDriverWait(self.driver, timeout).until(
+                EC.presence_of_element_located(
+                    (By.CSS_SELECTOR, '.jobs-description-content__text, .job-details-about-the-job-module__description'))
+            )
+            logger.debug("Job details rendered")
+        except TimeoutException:
+            logger.warning(f"Job details did not render within {timeout} seconds, continuing anyway")
+
     def _find_easy_apply_button(self, job: Any) -> WebElement:
         logger.debug("Searching for 'Easy Apply' button")
         attempt = 0
@@ -241,6 +256,9 @@ class AIHawkEasyApplier:
                 logger.debug("First class not found, checking for second class for premium members")
                 description = self.driver.find_element(By.CLASS_NAME, 'job-details-about-the-job-module__description').text
 
+            # Whitespace runs are pure token overhead in every prompt the description is sent to
+            lines = (HORIZONTAL_WHITESPACE_RE.sub(' ', line).strip() for line in description.splitlines())
+            description = BLANK_LINES_RE.sub('\n\n', '\n'.join(lines)).strip()
             logger.debug("Job description retrieved successfully")
             return description
         except NoSuchElementException:
@@ -864,6 +882,6 @@ class AIHawkEasyApplier:
 
     def _sanitize_text(self, text: str) -> str:
         sanitized_text = text.lower().strip().replace('"', '').replace('\\', '')
-        sanitized_text = re.sub(r'[\x00-\x1F\x7F]', '', sanitized_text).replace('\n', ' ').replace('\r', '').rstrip(',')
+        sanitized_text = CONTROL_CHARS_RE.sub('', sanitized_text).replace('\n', ' ').replace('\r', '').rstrip(',')
         logger.debug(f"Sanitized text: {sanitized_text}")
         return sanitized_text
@@ -1,15 +1,19 @@
+import functools
+import hashlib
 import json
 import os
 import re
 import textwrap
-import time
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List
 from typing import Union
 
 import httpx
+import openai
 from Levenshtein import distance
 from dotenv import load_dotenv
 from langchain_core.messages import BaseMessage
@@ -17,12 +21,116 @@ from langchain_core.messages.ai import AIMessage
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompt_values import StringPromptValue
 from langchain_core.prompts import ChatPromptTemplate
+from tenacity import RetryCallState, retry, retry_if_exception, stop_after_attempt, wait_random_exponential
 
 import src.strings as strings
 from loguru import logger
 
 load_dotenv()
 
+JOB_SUMMARY_CACHE_DIR = Path("data_folder/output/job_summaries")
+CALLS_LOG_LOCK = threading.Lock()
+
+SECTION_NAME_RE = re.compile(
+    r"(Personal information|Self Identification|Legal Authorization|Work Preferences|Education "
+    r"Details|Experience Details|Projects|Availability|Salary "
+    r"Expectations|Certifications|Languages|Interests|Cover letter)",
+    re.IGNORECASE)
+NUMBER_RE = re.compile(r"\d+")
+WAIT_TIME_RE = re.compile(r"try again in (\d+(?:\.\d+)?)\s*(ms|s)\b", re.IGNORECASE)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+MAX_RETRY_WAIT = 60
+
+SECTION_TEMPLATES = {
+    "personal_information": strings.personal_information_template,
+    "self_identification": strings.self_identification_template,
+    "legal_authorization": strings.legal_authorization_template,
+    "work_preferences": strings.work_preferences_template,
+    "education_details": strings.education_details_template,
+    "experience_details": strings.experience_details_template,
+    "projects": strings.projects_template,
+    "availability": strings.availability_template,
+    "salary_expectations": strings.salary_expectations_template,
+    "certifications": strings.certifications_template,
+    "languages": strings.languages_template,
+    "interests": strings.interests_template,
+    "cover_letter": strings.coverletter_template,
+}
+
+
+def parse_wait_time(error: BaseException) -> float | None:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        logger.debug(f"Ignoring unparsable retry-after header in: {headers}")
+
+    match = WAIT_TIME_RE.search(str(error))
+    if match:
+        wait_time = float(match.group(1))
+        return wait_time / 1000.0 if match.group(2).lower() == "ms" else wait_time
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def connection_error_types() -> tuple:
+    # Provider SDKs are optional, only the installed ones contribute their connection errors
+    error_types = [ConnectionError, TimeoutError, httpx.TransportError, openai.APIConnectionError]
+    try:
+        import anthropic
+        error_types.append(anthropic.APIConnectionError)
+    except ImportError:
+        pass
+    try:
+        import requests
+        error_types.extend([requests.exceptions.ConnectionError, requests.exceptions.Timeout])
+    except ImportError:
+        pass
+    return tuple(error_types)
+
+
+def get_status_code(error: BaseException) -> int | None:
+    # openai/anthropic/ollama expose status_code, httpx/requests errors carry a response,
+    # and google.api_core errors expose the HTTP status as code
+    response = getattr(error, "response", None)
+    for status_code in (getattr(error, "status_code", None),
+                        getattr(response, "status_code", None),
+                        getattr(error, "code", None)):
+        if isinstance(status_code, int):
+            return int(status_code)
+    return None
+
+
+def is_retryable_llm_error(error: BaseException) -> bool:
+    if not isinstance(error, Exception):
+        return False
+    if isinstance(error, connection_error_types()):
+        return True
+    return get_status_code(error) in RETRYABLE_STATUS_CODES
+
+
+_exponential_wait = wait_random_exponential(min=1, max=MAX_RETRY_WAIT)
+
+
+def wait_for_rate_limit(retry_state: RetryCallState) -> float:
+    # Exponential backoff, but never shorter than the wait the server asked for, up to MAX_RETRY_WAIT
+    wait_time = _exponential_wait(retry_state)
+    suggested_wait_time = parse_wait_time(retry_state.outcome.exception())
+    if suggested_wait_time is not None:
+        wait_time = max(wait_time, min(suggested_wait_time, MAX_RETRY_WAIT))
+    return wait_time
+
+
+def log_retry_attempt(retry_state: RetryCallState) -> None:
+    logger.warning(
+        f"LLM call failed with {retry_state.outcome.exception()!r}. "
+        f"Waiting {retry_state.next_action.sleep:.1f} seconds before retrying (attempt {retry_state.attempt_number})...")
+
 
 class AIModel(ABC):
     @abstractmethod
@@ -33,8 +141,9 @@ class AIModel(ABC):
 class OpenAIModel(AIModel):
     def __init__(self, api_key: str, llm_model: str):
         from langchain_openai import ChatOpenAI
+        # Retries are handled by LoggerChatModel, SDK retries would multiply them
         self.model = ChatOpenAI(model_name=llm_model, openai_api_key=api_key,
-                                temperature=0.4)
+                                temperature=0.4, max_retries=0)
 
     def invoke(self, prompt: str) -> BaseMessage:
         logger.debug("Invoking OpenAI API")
@@ -46,7 +155,7 @@ class ClaudeModel(AIModel):
     def __init__(self, api_key: str, llm_model: str):
         from langchain_anthropic import ChatAnthropic
         self.model = ChatAnthropic(model=llm_model, api_key=api_key,
-                                   temperature=0.4)
+                                   temperature=0.4, max_retries=0)
 
     def invoke(self, prompt: str) -> BaseMessage:
         response = self.model.invoke(prompt)
@@ -72,7 +181,7 @@ class OllamaModel(AIModel):
 class GeminiModel(AIModel):
     def __init__(self, api_key:str, llm_model: str):
         from langchain_google_genai import ChatGoogleGenerativeAI, HarmBlockThreshold, HarmCategory
-        self.model = ChatGoogleGenerativeAI(model=llm_model, google_api_key=api_key,safety_settings={
+        self.model = ChatGoogleGenerativeAI(model=llm_model, google_api_key=api_key, max_retries=0, safety_settings={
         HarmCategory.HARM_CATEGORY_UNSPECIFIED: HarmBlockThreshold.BLOCK_NONE,
         HarmCategory.HARM_CATEGORY_DEROGATORY: HarmBlockThreshold.BLOCK_NONE,
         HarmCategory.HARM_CATEGORY_TOXICITY: HarmBlockThreshold.BLOCK_NONE,
@@ -230,9 +339,10 @@ class LLMLogger:
             raise
 
         try:
-            with open(calls_log, "a", encoding="utf-8") as f:
-                json_string = json.dumps(
-                    log_entry, ensure_ascii=False, indent=4)
+            json_string = json.dumps(
+                log_entry, ensure_ascii=False, indent=4)
+            # Background summaries and form answers log concurrently, keep entries whole
+            with CALLS_LOG_LOCK, open(calls_log, "a", encoding="utf-8") as f:
                 f.write(json_string + "\n")
                 logger.debug(f"Log entry written to file: {calls_log}")
         except Exception as e:
@@ -241,60 +351,33 @@ class LLMLogger:
 
 
 class LoggerChatModel:
-
     def __init__(self, llm: Union[OpenAIModel, OllamaModel, ClaudeModel, GeminiModel]):
         self.llm = llm
         logger.debug(f"LoggerChatModel successfully initialized with LLM: {llm}")
 
     def __call__(self, messages: List[Dict[str, str]]) -> str:
         logger.debug(f"Entering __call__ method with messages: {messages}")
-        while True:
-            try:
-                logger.debug("Attempting to call the LLM with messages")
-
-                reply = self.llm.invoke(messages)
-                logger.debug(f"LLM response received: {reply}")
-
-                parsed_reply = self.parse_llmresult(reply)
-                logger.debug(f"Parsed LLM reply: {parsed_reply}")
-
-                LLMLogger.log_request(
-                    prompts=messages, parsed_reply=parsed_reply)
-                logger.debug("Request successfully logged")
-
-                return reply
-
-            except httpx.HTTPStatusError as e:
-                logger.error(f"HTTPStatusError encountered: {str(e)}")
-                if e.response.status_code == 429:
-                    retry_after = e.response.headers.get('retry-after')
-                    retry_after_ms = e.response.headers.get('retry-after-ms')
-
-                    if retry_after:
-                        wait_time = int(retry_after)
-                        logger.warning(
-                            f"Rate limit exceeded. Waiting for {wait_time} seconds before retrying (extracted from 'retry-after' header)...")
-                        time.sleep(wait_time)
-                    elif retry_after_ms:
-                        wait_time = int(retry_after_ms) / 1000.0
-                        logger.warning(
-                            f"Rate limit exceeded. Waiting for {wait_time} seconds before retrying (extracted from 'retry-after-ms' header)...")
-                        time.sleep(wait_time)
-                    else:
-                        wait_time = 30
-                        logger.warning(
-                            f"'retry-after' header not found. Waiting for {wait_time} seconds before retrying (default)...")
-                        time.sleep(wait_time)
-                else:
-                    logger.error(f"HTTP error occurred with status code: {e.response.status_code}, waiting 30 seconds before retrying")
-                    time.sleep(30)
+        reply = self._invoke_llm(messages)
+        logger.debug(f"LLM response received: {reply}")
 
-            except Exception as e:
-                logger.error(f"Unexpected error occurred: {str(e)}")
-                logger.info(
-                    "Waiting for 30 seconds before retrying due to an unexpected error.")
-                time.sleep(30)
-                continue
+        try:
+            parsed_reply = self.parse_llmresult(reply)
+            logger.debug(f"Parsed LLM reply: {parsed_reply}")
+
+            LLMLogger.log_request(
+                prompts=messages, parsed_reply=parsed_reply)
+            logger.debug("Request successfully logged")
+        except Exception as e:
+            logger.error(f"Failed to log LLM request: {str(e)}")
+
+        return reply
+
+    @retry(wait=wait_for_rate_limit, stop=stop_after_attempt(5),
+           retry=retry_if_exception(is_retryable_llm_error),
+           before_sleep=log_retry_attempt, reraise=True)
+    def _invoke_llm(self, messages: List[Dict[str, str]]) -> BaseMessage:
+        logger.debug("Attempting to call the LLM with messages")
+        return self.llm.invoke(messages)
 
     def parse_llmresult(self, llmresult: AIMessage) -> Dict[str, Dict]:
         logger.debug(f"Parsing LLM result: {llmresult}")
@@ -359,6 +442,23 @@ class GPTAnswerer:
     def __init__(self, config, llm_api_key):
         self.ai_adapter = AIAdapter(config, llm_api_key)
         self.llm_cheap = LoggerChatModel(self.ai_adapter)
+        self._section_cache: Dict[str, str] = {}
+        self._executor = ThreadPoolExecutor(max_workers=2)
+        summarize_template = self._preprocess_template_string(strings.summarize_prompt_template)
+        self._summarize_chain = self._create_chain(summarize_template)
+        # Summaries are only reusable for the same model and prompt
+        self._summary_cache_namespace = "\0".join(
+            [config['llm_model_type'], config['llm_model'], summarize_template])
+        self._numeric_chain = self._create_chain(
+            self._preprocess_template_string(strings.numeric_question_template))
+        self._options_chain = self._create_chain(
+            self._preprocess_template_string(strings.options_template))
+        self._section_chain = self._create_chain(strings.determine_section_template)
+        self._resume_or_cover_chain = self._create_chain(strings.resume_or_cover_template)
+        self._section_chains = {
+            section: self._create_chain(template)
+            for section, template in SECTION_TEMPLATES.items()
+        }
 
     @property
     def job_description(self):
@@ -392,23 +492,60 @@ class GPTAnswerer:
     def set_job(self, job):
         logger.debug(f"Setting job: {job}")
         self.job = job
-        self.job.set_summarize_job_description(
-            self.summarize_job_description(self.job.description))
+        # The summary is not needed to fill the form, so it is generated in the background
+        self._executor.submit(self._summarize_job, job)
+
+    def _summarize_job(self, job):
+        try:
+            job.set_summarize_job_description(
+                self.summarize_job_description(job.description))
+        except Exception as e:
+            logger.error(f"Failed to summarize job description: {str(e)}")
+
+    def close(self):
+        # Queued summaries are dropped so an interrupted run does not keep calling the LLM
+        logger.debug("Cancelling queued job summaries and waiting for running ones before closing")
+        self._executor.shutdown(wait=True, cancel_futures=True)
 
     def set_job_application_profile(self, job_application_profile):
         logger.debug(f"Setting job application profile: {job_application_profile}")
         self.job_application_profile = job_application_profile
 
+    def _summary_cache_path(self, text: str) -> Path:
+        key = hashlib.sha256(
+            f"{self._summary_cache_namespace}\0{text}".encode("utf-8")).hexdigest()
+        return JOB_SUMMARY_CACHE_DIR / f"{key}.json"
+
+    @staticmethod
+    def _load_cached_summary(cache_path: Path) -> str | None:
+        if not cache_path.exists():
+            return None
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)["summary"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable summary cache entry {cache_path}: {str(e)}")
+            return None
+
+    @staticmethod
+    def _save_cached_summary(cache_path: Path, summary: str) -> None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_path, "w", encoding="utf-8") as f:
+                json.dump({"summary": summary}, f, ensure_ascii=False)
+        except OSError as e:
+            logger.warning(f"Failed to write summary cache entry {cache_path}: {str(e)}")
+
     def summarize_job_description(self, text: str) -> str:
         logger.debug(f"Summarizing job description: {text}")
-        strings.summarize_prompt_template = self._preprocess_template_string(
-            strings.summarize_prompt_template
-        )
-        prompt = ChatPromptTemplate.from_template(
-            strings.summarize_prompt_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        output = chain.invoke({"text": text})
+        cache_path = self._summary_cache_path(text)
+        cached_summary = self._load_cached_summary(cache_path)
+        if cached_summary is not None:
+            logger.debug(f"Using cached summary from: {cache_path}")
+            return cached_summary
+        output = self._summarize_chain.invoke({"text": text})
         logger.debug(f"Summary generated: {output}")
+        self._save_cached_summary(cache_path, output)
         return output
 
     def _create_chain(self, template: str):
@@ -416,127 +553,30 @@ class GPTAnswerer:
         prompt = ChatPromptTemplate.from_template(template)
         return prompt | self.llm_cheap | StrOutputParser()
 
-    def answer_question_textual_wide_range(self, question: str) -> str:
-        logger.debug(f"Answering textual question: {question}")
-        chains = {
-            "personal_information": self._create_chain(strings.personal_information_template),
-            "self_identification": self._create_chain(strings.self_identification_template),
-            "legal_authorization": self._create_chain(strings.legal_authorization_template),
-            "work_preferences": self._create_chain(strings.work_preferences_template),
-            "education_details": self._create_chain(strings.education_details_template),
-            "experience_details": self._create_chain(strings.experience_details_template),
-            "projects": self._create_chain(strings.projects_template),
-            "availability": self._create_chain(strings.availability_template),
-            "salary_expectations": self._create_chain(strings.salary_expectations_template),
-            "certifications": self._create_chain(strings.certifications_template),
-            "languages": self._create_chain(strings.languages_template),
-            "interests": self._create_chain(strings.interests_template),
-            "cover_letter": self._create_chain(strings.coverletter_template),
-        }
-        section_prompt = """You are assisting a bot designed to automatically apply for jobs on AIHawk. The bot receives various questions about job applications and needs to determine the most relevant section of the resume to provide an accurate response.
-
-        For the following question: '{question}', determine which section of the resume is most relevant. 
-        Respond with exactly one of the following options:
-        - Personal information
-        - Self Identification
-        - Legal Authorization
-        - Work Preferences
-        - Education Details
-        - Experience Details
-        - Projects
-        - Availability
-        - Salary Expectations
-        - Certifications
-        - Languages
-        - Interests
-        - Cover letter
-
-        Here are detailed guidelines to help you choose the correct section:
-
-        1. **Personal Information**:
-        - **Purpose**: Contains your basic contact details and online profiles.
-        - **Use When**: The question is about how to contact you or requests links to your professional online presence.
-        - **Examples**: Email address, phone number, AIHawk profile, GitHub repository, personal website.
-
-        2. **Self Identification**:
-        - **Purpose**: Covers personal identifiers and demographic information.
-        - **Use When**: The question pertains to your gender, pronouns, veteran status, disability status, or ethnicity.
-        - **Examples**: Gender, pronouns, veteran status, disability status, ethnicity.
-
-        3. **Legal Authorization**:
-        - **Purpose**: Details your work authorization status and visa requirements.
-        - **Use When**: The question asks about your ability to work in specific countries or if you need sponsorship or visas.
-        - **Examples**: Work authorization in EU and US, visa requirements, legally allowed to work.
-
-        4. **Work Preferences**:
-        - **Purpose**: Specifies your preferences regarding work conditions and job roles.
-        - **Use When**: The question is about your preferences for remote work, in-person work, relocation, and willingness to undergo assessments or background checks.
-        - **Examples**: Remote work, in-person work, open to relocation, willingness to complete assessments.
-
-        5. **Education Details**:
-        - **Purpose**: Contains information about your academic qualifications.
-        - **Use When**: The question concerns your degrees, universities attended, GPA, and relevant coursework.
-        - **Examples**: Degree, university, GPA, field of study, exams.
-
-        6. **Experience Details**:
-        - **Purpose**: Details your professional work history and key responsibilities.
-        - **Use When**: The question pertains to your job roles, responsibilities, and achievements in previous positions.
-        - **Examples**: Job positions, company names, key responsibilities, skills acquired.
-
-        7. **Projects**:
-        - **Purpose**: Highlights specific projects you have worked on.
-        - **Use When**: The question asks about particular projects, their descriptions, or links to project repositories.
-        - **Examples**: Project names, descriptions, links to project repositories.
-
-        8. **Availability**:
-        - **Purpose**: Provides information on your availability for new roles.
-        - **Use When**: The question is about how soon you can start a new job or your notice period.
-        - **Examples**: Notice period, availability to start.
-
-        9. **Salary Expectations**:
-        - **Purpose**: Covers your expected salary range.
-        - **Use When**: The question pertains to your salary expectations or compensation requirements.
-        - **Examples**: Desired salary range.
-
-        10. **Certifications**:
-            - **Purpose**: Lists your professional certifications or licenses.
-            - **Use When**: The question involves your certifications or qualifications from recognized organizations.
-            - **Examples**: Certification names, issuing bodies, dates of validity.
-
-        11. **Languages**:
-            - **Purpose**: Describes the languages you can speak and your proficiency levels.
-            - **Use When**: The question asks about your language skills or proficiency in specific languages.
-            - **Examples**: Languages spoken, proficiency levels.
-
-        12. **Interests**:
-            - **Purpose**: Details your personal or professional interests.
-            - **Use When**: The question is about your hobbies, interests, or activities outside of work.
-            - **Examples**: Personal hobbies, professional interests.
-
-        13. **Cover Letter**:
-            - **Purpose**: Contains your personalized cover letter or statement.
-            - **Use When**: The question involves your cover letter or specific written content intended for the job application.
-            - **Examples**: Cover letter content, personalized statements.
-
-        Provide only the exact name of the section from the list above with no additional text.
-        """
-        prompt = ChatPromptTemplate.from_template(section_prompt)
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        output = chain.invoke({"question": question})
-
-        match = re.search(
-            r"(Personal information|Self Identification|Legal Authorization|Work Preferences|Education "
-            r"Details|Experience Details|Projects|Availability|Salary "
-            r"Expectations|Certifications|Languages|Interests|Cover letter)",
-            output, re.IGNORECASE)
+    def _determine_section(self, question: str) -> str:
+        cache_key = " ".join(question.lower().split())
+        if cache_key in self._section_cache:
+            logger.debug(f"Using cached section for question: {question}")
+            return self._section_cache[cache_key]
+
+        output = self._section_chain.invoke({"question": question})
+
+        match = SECTION_NAME_RE.search(output)
         if not match:
             raise ValueError(
                 "Could not extract section name from the response.")
 
         section_name = match.group(1).lower().replace(" ", "_")
+        self._section_cache[cache_key] = section_name
+        logger.debug(f"Section determined: {section_name}")
+        return section_name
+
+    def answer_question_textual_wide_range(self, question: str) -> str:
+        logger.debug(f"Answering textual question: {question}")
+        section_name = self._determine_section(question)
 
         if section_name == "cover_letter":
-            chain = chains.get(section_name)
+            chain = self._section_chains.get(section_name)
             output = chain.invoke(
                 {"resume": self.resume, "job_description": self.job_description})
             logger.debug(f"Cover letter generated: {output}")
@@ -547,7 +587,7 @@ class GPTAnswerer:
             logger.error(
                 f"Section '{section_name}' not found in either resume or job_application_profile.")
             raise ValueError(f"Section '{section_name}' not found in either resume or job_application_profile.")
-        chain = chains.get(section_name)
+        chain = self._section_chains.get(section_name)
         if chain is None:
             logger.error(f"Chain not defined for section '{section_name}'")
             raise ValueError(f"Chain not defined for section '{section_name}'")
@@ -558,11 +598,7 @@ class GPTAnswerer:
 
     def answer_question_numeric(self, question: str, default_experience: str = 3) -> str:
         logger.debug(f"Answering numeric question: {question}")
-        func_template = self._preprocess_template_string(
-            strings.numeric_question_template)
-        prompt = ChatPromptTemplate.from_template(func_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        output_str = chain.invoke(
+        output_str = self._numeric_chain.invoke(
             {"resume_educations": self.resume.education_details, "resume_jobs": self.resume.experience_details,
              "resume_projects": self.resume.projects, "question": question})
         logger.debug(f"Raw output for numeric question: {output_str}")
@@ -577,7 +613,7 @@ class GPTAnswerer:
 
     def extract_number_from_string(self, output_str):
         logger.debug(f"Extracting number from string: {output_str}")
-        numbers = re.findall(r"\d+", output_str)
+        numbers = NUMBER_RE.findall(output_str)
         if numbers:
             logger.debug(f"Numbers found: {numbers}")
             return str(numbers[0])
@@ -587,11 +623,7 @@ class GPTAnswerer:
 
     def answer_question_from_options(self, question: str, options: list[str]) -> str:
         logger.debug(f"Answering question from options: {question}")
-        func_template = self._preprocess_template_string(
-            strings.options_template)
-        prompt = ChatPromptTemplate.from_template(func_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        output_str = chain.invoke(
+        output_str = self._options_chain.invoke(
             {"resume": self.resume, "question": question, "options": options})
         logger.debug(f"Raw output for options question: {output_str}")
         best_option = self.find_best_match(output_str, options)
@@ -601,17 +633,7 @@ class GPTAnswerer:
     def resume_or_cover(self, phrase: str) -> str:
         logger.debug(
             f"Determining if phrase refers to resume or cover letter: {phrase}")
-        prompt_template = """
-                Given the following phrase, respond with only 'resume' if the phrase is about a resume, or 'cover' if it's about a cover letter.
-                If the phrase contains only one word 'upload', consider it as 'cover'.
-                If the phrase contains 'upload resume', consider it as 'resume'.
-                Do not provide any additional information or explanations.
-
-                phrase: {phrase}
-                """
-        prompt = ChatPromptTemplate.from_template(prompt_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        response = chain.invoke({"phrase": phrase})
+        response = self._resume_or_cover_chain.invoke({"phrase": phrase})
         logger.debug(f"Response for resume_or_cover: {response}")
         if "resume" in response:
             return "resume"
@@ -1,5 +1,7 @@
 import pytest
 from unittest import mock
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
 from src.aihawk_easy_applier import AIHawkEasyApplier
 
 
@@ -95,3 +97,32 @@ def test_check_for_premium_redirect_with_redirect(mocker, easy_applier):
 
     # Verify that it attempted to return to the job page 3 times
     assert easy_applier.driver.get.call_count == 3
+
+
+def test_get_job_description_collapses_whitespace(mocker, easy_applier):
+    """Test that the job description is returned without redundant whitespace."""
+    easy_applier.driver.find_element.side_effect = [
+        NoSuchElementException(),
+        mock.Mock(text="  About   the job\n\n \n\nWe are\thiring.\n  \n\n"
+                       "Responsibilities:  \n    - Build things\t\n    -\xa0Ship  them \n"),
+    ]
+
+    assert easy_applier._get_job_description() == (
+        "About the job\n\nWe are hiring.\n\nResponsibilities:\n- Build things\n- Ship them")
+
+
+def test_wait_for_job_details(easy_applier):
+    """Test that the wait returns as soon as the job details container is present."""
+    easy_applier._wait_for_job_details()
+
+    easy_applier.driver.find_element.assert_called_once_with(
+        By.CSS_SELECTOR, '.jobs-description-content__text, .job-details-about-the-job-module__description')
+
+
+def test_wait_for_job_details_timeout(easy_applier):
+    """Test that a page without job details does not abort the application."""
+    easy_applier.driver.find_element.side_effect = NoSuchElementException()
+
+    easy_applier._wait_for_job_details(timeout=0.1)
+
+    assert easy_applier.driver.find_element.called
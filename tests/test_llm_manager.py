@@ -0,0 +1,295 @@
+import io
+import json
+import threading
+import time
+
+import anthropic
+import httpx
+import openai
+import pytest
+from google.api_core.exceptions import InvalidArgument, ResourceExhausted, ServiceUnavailable
+from ollama import ResponseError
+from langchain_core.messages.ai import AIMessage
+
+from src.llm.llm_manager import (MAX_RETRY_WAIT, ClaudeModel, GeminiModel, GPTAnswerer, LLMLogger, LoggerChatModel,
+                                 OpenAIModel, is_retryable_llm_error, parse_wait_time)
+
+
+def fake_llm(reply: str):
+    """Build a callable standing in for LoggerChatModel that records its calls."""
+    calls = []
+
+    def llm(messages):
+        calls.append(messages)
+        return AIMessage(content=reply)
+
+    llm.calls = calls
+    return llm
+
+
+@pytest.fixture
+def make_gpt_answerer(mocker):
+    """Fixture returning a factory for GPTAnswerer backed by a fake LLM."""
+    mocker.patch('src.llm.llm_manager.AIAdapter')
+
+    def make(llm, llm_model='gpt-4o-mini'):
+        mocker.patch('src.llm.llm_manager.LoggerChatModel', return_value=llm)
+        return GPTAnswerer({'llm_model_type': 'openai', 'llm_model': llm_model}, 'api_key')
+
+    return make
+
+
+@pytest.fixture
+def gpt_answerer(make_gpt_answerer):
+    """Fixture to initialize GPTAnswerer without a real model behind it."""
+    return make_gpt_answerer(fake_llm(""))
+
+
+def test_determine_section(make_gpt_answerer):
+    """Test that the section name is extracted from the model reply."""
+    gpt_answerer = make_gpt_answerer(fake_llm("Experience Details"))
+
+    assert gpt_answerer._determine_section("What was your last job?") == "experience_details"
+
+
+def test_determine_section_is_cached(make_gpt_answerer):
+    """Test that repeated questions do not trigger another classification call."""
+    llm = fake_llm("Salary Expectations")
+    gpt_answerer = make_gpt_answerer(llm)
+
+    gpt_answerer._determine_section("What are your salary expectations?")
+    section = gpt_answerer._determine_section("  what are your  SALARY expectations? ")
+
+    assert section == "salary_expectations"
+    assert len(llm.calls) == 1
+
+
+def test_determine_section_unknown_reply(make_gpt_answerer):
+    """Test that an unrecognised reply raises and is not cached."""
+    gpt_answerer = make_gpt_answerer(fake_llm("I don't know"))
+
+    with pytest.raises(ValueError, match="Could not extract section name"):
+        gpt_answerer._determine_section("Anything else?")
+
+    assert gpt_answerer._section_cache == {}
+
+
+def test_set_job_summarizes_in_background(mocker, gpt_answerer):
+    """Test that the summary is attached in the background and close waits for it."""
+    mocker.patch.object(gpt_answerer, 'summarize_job_description', return_value="Summary")
+    job = mocker.Mock(description="Job description")
+
+    gpt_answerer.set_job(job)
+    gpt_answerer.close()
+
+    gpt_answerer.summarize_job_description.assert_called_once_with("Job description")
+    job.set_summarize_job_description.assert_called_once_with("Summary")
+    with pytest.raises(RuntimeError):
+        gpt_answerer.set_job(job)
+
+
+def test_close_cancels_queued_summaries(mocker, gpt_answerer):
+    """Test that close only waits for running summaries and drops queued ones."""
+    release = threading.Event()
+
+    def summarize(description):
+        release.wait(timeout=5)
+        return "Summary"
+
+    mocker.patch.object(gpt_answerer, 'summarize_job_description', side_effect=summarize)
+    jobs = [mocker.Mock(description=f"Job description {index}") for index in range(3)]
+    for job in jobs:
+        gpt_answerer.set_job(job)
+
+    threading.Timer(0.2, release.set).start()
+    gpt_answerer.close()
+
+    jobs[2].set_summarize_job_description.assert_not_called()
+
+
+def test_set_job_summary_failure_is_logged(mocker, gpt_answerer):
+    """Test that a failing summary does not propagate to the caller."""
+    mocker.patch.object(gpt_answerer, 'summarize_job_description', side_effect=Exception("Test error"))
+    job = mocker.Mock(description="Job description")
+
+    gpt_answerer.set_job(job)
+    gpt_answerer.close()
+
+    job.set_summarize_job_description.assert_not_called()
+
+
+def test_summarize_job_description_uses_disk_cache(mocker, tmp_path, make_gpt_answerer):
+    """Test that a description is only summarized once and then served from disk."""
+    mocker.patch('src.llm.llm_manager.JOB_SUMMARY_CACHE_DIR', tmp_path)
+    llm = fake_llm("Summary")
+    gpt_answerer = make_gpt_answerer(llm)
+
+    first = gpt_answerer.summarize_job_description("Job description")
+    second = gpt_answerer.summarize_job_description("Job description")
+
+    assert first == second == "Summary"
+    assert len(llm.calls) == 1
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+
+def test_summary_cache_key_depends_on_model_and_template(mocker, make_gpt_answerer):
+    """Test that switching model or summary prompt does not reuse old summaries."""
+    path = make_gpt_answerer(fake_llm(""))._summary_cache_path("Job description")
+    other_model_path = make_gpt_answerer(fake_llm(""), llm_model='gpt-4o')._summary_cache_path("Job description")
+    mocker.patch('src.strings.summarize_prompt_template', "Summarize: {text}")
+    other_template_path = make_gpt_answerer(fake_llm(""))._summary_cache_path("Job description")
+
+    assert len({path, other_model_path, other_template_path}) == 3
+
+
+def test_summarize_job_description_ignores_corrupt_cache(mocker, tmp_path, make_gpt_answerer):
+    """Test that an unreadable cache entry falls back to the LLM."""
+    mocker.patch('src.llm.llm_manager.JOB_SUMMARY_CACHE_DIR', tmp_path)
+    gpt_answerer = make_gpt_answerer(fake_llm("Summary"))
+    gpt_answerer._summary_cache_path("Job description").write_text("not json")
+
+    assert gpt_answerer.summarize_job_description("Job description") == "Summary"
+
+
+def test_log_request_entries_are_not_interleaved(mocker, tmp_path):
+    """Test that concurrent log writes each land as one complete JSON entry."""
+    mocker.patch('src.llm.llm_manager.Path', return_value=tmp_path)
+    written = []
+
+    class ChunkedFile(io.StringIO):
+        def write(self, text):
+            # Yield to the other writers between chunks, like a large write split by the OS
+            for start in range(0, len(text), 64):
+                written.append(text[start:start + 64])
+                time.sleep(0.001)
+            return len(text)
+
+    mocker.patch('src.llm.llm_manager.open', create=True, side_effect=lambda *args, **kwargs: ChunkedFile())
+    parsed_reply = {
+        "content": "x" * 1000,
+        "response_metadata": {"model_name": "gpt-4o-mini"},
+        "usage_metadata": {"input_tokens": 1, "output_tokens": 1, "total_tokens": 2},
+    }
+    prompts = mocker.Mock(messages=[mocker.Mock(content="prompt")])
+
+    threads = [threading.Thread(target=LLMLogger.log_request, args=(prompts, parsed_reply)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    decoder = json.JSONDecoder()
+    content = "".join(written)
+    entries, position = [], 0
+    while position < len(content):
+        entry, position = decoder.raw_decode(content, position)
+        entries.append(entry)
+        position += 1
+    assert len(entries) == 4
+
+
+def test_answer_question_numeric(make_gpt_answerer, mocker):
+    """Test that the prebuilt numeric chain is used and its number extracted."""
+    gpt_answerer = make_gpt_answerer(fake_llm("I have 5 years of experience"))
+    gpt_answerer.set_resume(mocker.Mock())
+
+    assert gpt_answerer.answer_question_numeric("Years of Python?") == "5"
+
+
+def rate_limit_error(headers=None, message="Rate limit reached"):
+    """Build an httpx 429 error like the ones raised by the providers."""
+    request = httpx.Request("POST", "https://api.example.com")
+    response = httpx.Response(429, headers=headers or {}, request=request)
+    return httpx.HTTPStatusError(message, request=request, response=response)
+
+
+@pytest.mark.parametrize("error, expected", [
+    (rate_limit_error({"retry-after": "7"}), 7.0),
+    (rate_limit_error({"retry-after-ms": "1500"}), 1.5),
+    (rate_limit_error(message="Please try again in 20s."), 20.0),
+    (rate_limit_error(message="Please try again in 250ms."), 0.25),
+    (rate_limit_error(), None),
+])
+def test_parse_wait_time(error, expected):
+    """Test that wait hints are read from headers first, then from the message."""
+    assert parse_wait_time(error) == expected
+
+
+def test_logger_chat_model_retries_rate_limit(mocker):
+    """Test that a rate-limited call is retried and logging failures are not fatal."""
+    sleep = mocker.patch.object(LoggerChatModel._invoke_llm.retry, 'sleep')
+    mocker.patch.object(LLMLogger, 'log_request', side_effect=OSError("read-only"))
+    llm = mocker.Mock()
+    reply = AIMessage(content="answer")
+    llm.invoke.side_effect = [rate_limit_error({"retry-after": "3"}), reply]
+
+    assert LoggerChatModel(llm)("prompt") is reply
+    assert llm.invoke.call_count == 2
+    assert sleep.call_args.args[0] >= 3
+
+
+def test_logger_chat_model_caps_suggested_wait(mocker):
+    """Test that an excessive retry-after hint is capped at MAX_RETRY_WAIT."""
+    sleep = mocker.patch.object(LoggerChatModel._invoke_llm.retry, 'sleep')
+    mocker.patch.object(LLMLogger, 'log_request')
+    llm = mocker.Mock()
+    reply = AIMessage(content="answer")
+    llm.invoke.side_effect = [rate_limit_error({"retry-after": "3600"}), reply]
+
+    assert LoggerChatModel(llm)("prompt") is reply
+    assert sleep.call_args.args[0] <= MAX_RETRY_WAIT
+
+
+@pytest.mark.parametrize("model_class", [OpenAIModel, ClaudeModel, GeminiModel])
+def test_provider_sdk_retries_are_disabled(model_class):
+    """Test that provider clients do not retry on top of LoggerChatModel."""
+    assert model_class("api_key", "model").model.max_retries == 0
+
+
+def provider_response(status_code):
+    """Build the httpx response the openai and anthropic SDKs wrap in their errors."""
+    return httpx.Response(status_code, request=httpx.Request("POST", "https://api.example.com"))
+
+
+@pytest.mark.parametrize("error, expected", [
+    (anthropic.RateLimitError("Rate limited", response=provider_response(429), body=None), True),
+    (anthropic.InternalServerError("Overloaded", response=provider_response(529), body=None), True),
+    (anthropic.APIConnectionError(request=httpx.Request("POST", "https://api.example.com")), True),
+    (openai.InternalServerError("Server error", response=provider_response(500), body=None), True),
+    (openai.BadRequestError("Bad request", response=provider_response(400), body=None), False),
+    (ResourceExhausted("Quota exceeded"), True),
+    (ServiceUnavailable("Unavailable"), True),
+    (InvalidArgument("Bad request"), False),
+    (ResponseError("Too many requests", 429), True),
+    (httpx.ConnectError("Connection refused"), True),
+    (ValueError("bad prompt"), False),
+])
+def test_is_retryable_llm_error(error, expected):
+    """Test that transient errors are recognised for every supported provider."""
+    assert is_retryable_llm_error(error) is expected
+
+
+def test_logger_chat_model_retries_non_openai_rate_limit(mocker):
+    """Test that a rate limit from a non-OpenAI provider is retried."""
+    mocker.patch.object(LoggerChatModel._invoke_llm.retry, 'sleep')
+    mocker.patch.object(LLMLogger, 'log_request')
+    llm = mocker.Mock()
+    reply = AIMessage(content="answer")
+    llm.invoke.side_effect = [
+        anthropic.RateLimitError("Rate limited", response=provider_response(429), body=None),
+        ResourceExhausted("Quota exceeded"),
+        reply,
+    ]
+
+    assert LoggerChatModel(llm)("prompt") is reply
+    assert llm.invoke.call_count == 3
+
+
+def test_logger_chat_model_does_not_retry_other_errors(mocker):
+    """Test that non-transient errors propagate immediately."""
+    llm = mocker.Mock()
+    llm.invoke.side_effect = ValueError("bad prompt")
+
+    with pytest.raises(ValueError, match="bad prompt"):
+        LoggerChatModel(llm)("prompt")
+    assert llm.invoke.call_count == 1
@@ -0,0 +1,81 @@
+import os
+import sys
+
+import pytest
+
+from main import ConfigError, choose_resume_style, create_and_run_bot
+
+
+@pytest.fixture
+def style_manager(mocker):
+    """Fixture to mock the StyleManager with two available styles."""
+    style_manager = mocker.Mock()
+    style_manager.get_styles.return_value = {
+        "Clean Blue": ("style_clean_blue.css", "https://github.com/author"),
+        "Modern Grey": ("style_modern_grey.css", "https://github.com/author"),
+    }
+    return style_manager
+
+
+@pytest.fixture
+def resume_generator_manager(mocker):
+    """Fixture to mock the resume generator FacadeManager."""
+    return mocker.Mock(selected_style=None)
+
+
+def test_choose_resume_style_from_env(mocker, style_manager, resume_generator_manager):
+    """Test that AIHAWK_STYLE selects the style without prompting."""
+    mocker.patch('main.os.getenv', return_value="Modern Grey")
+
+    choose_resume_style(resume_generator_manager, style_manager)
+
+    assert resume_generator_manager.selected_style == "Modern Grey"
+    resume_generator_manager.choose_style.assert_not_called()
+
+
+def test_choose_resume_style_unknown_env_style(mocker, style_manager, resume_generator_manager):
+    """Test that a misspelled AIHAWK_STYLE fails at startup."""
+    mocker.patch('main.os.getenv', return_value="Modern Gray")
+
+    with pytest.raises(ConfigError, match="Unknown resume style 'Modern Gray'"):
+        choose_resume_style(resume_generator_manager, style_manager)
+
+    assert resume_generator_manager.selected_style is None
+    resume_generator_manager.choose_style.assert_not_called()
+
+
+def test_choose_resume_style_non_interactive(mocker, style_manager, resume_generator_manager):
+    """Test that the alphabetically first style is used when there is no terminal to prompt on."""
+    style_manager.get_styles.return_value = dict(reversed(style_manager.get_styles.return_value.items()))
+    mocker.patch('main.os.getenv', return_value=None)
+    mocker.patch('main.sys.stdin.isatty', return_value=False)
+
+    choose_resume_style(resume_generator_manager, style_manager)
+
+    assert resume_generator_manager.selected_style == "Clean Blue"
+    resume_generator_manager.choose_style.assert_not_called()
+
+
+def test_choose_resume_style_interactive(mocker, style_manager, resume_generator_manager):
+    """Test that the user is prompted when running in a terminal without AIHAWK_STYLE."""
+    mocker.patch('main.os.getenv', return_value=None)
+    mocker.patch('main.sys.stdin.isatty', return_value=True)
+
+    choose_resume_style(resume_generator_manager, style_manager)
+
+    resume_generator_manager.choose_style.assert_called_once()
+
+
+def test_create_and_run_bot_unknown_env_style(mocker, tmp_path, style_manager):
+    """Test that an unknown AIHAWK_STYLE surfaces as a configuration error, not a runtime error."""
+    resume_builder = mocker.Mock(StyleManager=mocker.Mock(return_value=style_manager))
+    mocker.patch.dict(sys.modules, {'lib_resume_builder_AIHawk': resume_builder})
+    mocker.patch.dict(os.environ, {'AIHAWK_STYLE': "Modern Gray"})
+    init_browser = mocker.patch('main.init_browser')
+    plain_text_resume = tmp_path / "plain_text_resume.yaml"
+    plain_text_resume.write_text("personal_information: {}", encoding="utf-8")
+
+    with pytest.raises(ConfigError, match="Unknown resume style 'Modern Gray'"):
+        create_and_run_bot({'uploads': {'plainTextResume': plain_text_resume}}, 'api_key')
+
+    init_browser.assert_not_called()